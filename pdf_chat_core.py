@@ -0,0 +1,371 @@
+"""
+PDF Chat Application with Claude AI
+This module holds the shared application logic: it enables interactive conversations with PDF
+documents using Anthropic's Claude 3.5 Sonnet, processes PDFs in chunks, maintains conversation
+history, and provides cited responses from the document. Entry scripts import main() and pass
+the PDF they want to serve.
+"""
+
+import streamlit as st
+import orjson
+import pybase64
+import os
+from dotenv import load_dotenv
+import hashlib
+import pathlib
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+def _encode_chunk(file_path, page_range):
+    """
+    Split one page range out of the PDF and return it base64-encoded.
+    Module-level so ProcessPoolExecutor can pickle it; each worker opens
+    its own document since fitz handles cannot cross process boundaries.
+    """
+    import fitz
+
+    start, end = page_range
+    src_doc = fitz.open(file_path)
+    chunk_doc = fitz.open()
+    chunk_doc.insert_pdf(src_doc, from_page=start, to_page=end - 1)
+    chunk_bytes = chunk_doc.tobytes()
+    # Release both document object graphs before the encode pass so the
+    # base64 buffer is not held alongside them
+    chunk_doc.close()
+    src_doc.close()
+    base64_pdf = pybase64.b64encode(chunk_bytes).decode('ascii')
+    return start + 1, end, base64_pdf
+
+def main(pdf_path):
+    """
+    Run the chat application for the given PDF.
+
+    Args:
+        pdf_path: Path to the PDF file to chat about
+    """
+    # Configure Streamlit page settings
+    st.set_page_config(page_title="PDF Chat with Claude", page_icon="📚")
+    st.title("📚 PDF Chat with Claude")
+    
+    # Initialize environment and API key
+    load_dotenv()
+    api_key = os.getenv("ANTHROPIC_API_KEY")
+    
+    # Debug mode toggle in sidebar for troubleshooting
+    debug_mode = st.sidebar.checkbox("Enable Debug Mode")
+    
+    # Sidebar configuration and instructions
+    with st.sidebar:
+        st.title("⚙️ Settings")
+        if not api_key:
+            api_key = st.text_input("Enter Anthropic API Key", type="password")
+        st.markdown("---")
+        st.markdown("📖 **How to use**\n1. Upload PDFs to 'documents' folder\n2. Ask questions about the content\n3. View citations in responses")
+
+    @st.cache_data(show_spinner=False)
+    def process_pdf(file_path):
+        """
+        Process PDF file into chunks suitable for Claude API.
+        Uses caching to avoid reprocessing the same file multiple times.
+        Splits PDF into 100-page chunks to stay within token limits.
+        
+        Args:
+            file_path: Path to the PDF file
+            
+        Returns:
+            tuple: (list of document chunks, content hash for cache validation)
+        """
+        try:
+            # Stat-based fingerprint for cache validation - O(1) instead of
+            # hashing every byte of the file
+            st_res = os.stat(file_path)
+            content_hash = f"{st_res.st_size}:{st_res.st_mtime_ns}"
+            base_name = os.path.basename(file_path)
+
+            def make_document(base64_pdf, first_page, last_page):
+                return {
+                    "type": "document",
+                    "source": {
+                        "type": "base64",
+                        "media_type": "application/pdf",
+                        "data": base64_pdf
+                    },
+                    "title": f"{base_name} (pages {first_page}-{last_page})",
+                    "citations": {"enabled": True}
+                }
+
+            # On-disk chunk cache keyed by file fingerprint - survives
+            # Streamlit cache eviction and app restarts
+            fingerprint = hashlib.sha256(f"{file_path}:{content_hash}".encode()).hexdigest()
+            cache_dir = pathlib.Path(".cache") / fingerprint
+            if cache_dir.is_dir():
+                documents = []
+                for chunk_file in sorted(cache_dir.glob("chunk_*.b64")):
+                    # File names encode the page range: chunk_0000_1-100.b64
+                    first_page, last_page = chunk_file.stem.split("_")[2].split("-")
+                    documents.append(make_document(chunk_file.read_bytes().decode('ascii'),
+                                                   first_page, last_page))
+                if documents:
+                    # Cache breakpoint on the last block covers all documents
+                    documents[-1]["cache_control"] = {"type": "ephemeral"}
+                    return documents, content_hash
+
+            # Deferred import - fitz is only needed on a full cache miss
+            import fitz
+
+            documents = []
+            chunks = []  # (first_page, last_page, base64 data) for the cache
+            with open(file_path, "rb") as file:
+                pdf_doc = fitz.open(file_path)
+                num_pages = pdf_doc.page_count
+
+                if num_pages <= 100:
+                    # Whole file fits in one chunk - encode the raw bytes as-is
+                    pdf_doc.close()
+                    base64_pdf = pybase64.b64encode(file.read()).decode('ascii')
+                    chunks.append((1, num_pages, base64_pdf))
+                else:
+                    pdf_doc.close()
+                    # Chunks are independent, so split and encode them in
+                    # parallel - both steps are CPU-bound
+                    ranges = [(start, min(start + 100, num_pages))
+                              for start in range(0, num_pages, 100)]
+                    with ProcessPoolExecutor() as executor:
+                        chunks = list(executor.map(partial(_encode_chunk, file_path), ranges))
+
+            # Persist the encoded chunks and build the document list
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            for idx, (first_page, last_page, base64_pdf) in enumerate(chunks):
+                (cache_dir / f"chunk_{idx:04d}_{first_page}-{last_page}.b64").write_bytes(
+                    base64_pdf.encode('ascii'))
+                documents.append(make_document(base64_pdf, first_page, last_page))
+            # Cache breakpoint on the last block covers all documents
+            documents[-1]["cache_control"] = {"type": "ephemeral"}
+            return documents, content_hash
+        except Exception as e:
+            st.error(f"PDF Processing Error: {str(e)}")
+            if debug_mode:
+                st.code(traceback.format_exc())
+            raise
+
+    @st.cache_resource(show_spinner=False)
+    def upload_pdf(file_path, fingerprint):
+        """
+        Upload the PDF once via the Anthropic files API and return its file id.
+        Keyed by the stat fingerprint so a changed file gets re-uploaded.
+
+        Args:
+            file_path: Path to the PDF file
+            fingerprint: size:mtime fingerprint of the file
+
+        Returns:
+            str: The uploaded file's id for use in file-source document blocks
+        """
+        try:
+            import anthropic
+
+            client = anthropic.Anthropic(api_key=api_key)
+            with open(file_path, "rb") as file:
+                file_obj = client.beta.files.upload(file=file)
+            return file_obj.id
+        except Exception as e:
+            st.error(f"PDF Upload Error: {str(e)}")
+            if debug_mode:
+                st.code(traceback.format_exc())
+            raise
+
+    # Load and validate PDF document
+    if not os.path.exists(pdf_path):
+        st.error(f"📄 PDF file not found at {pdf_path}")
+        return
+
+    # Opt-in files API mode: upload the PDF once and reference it by id,
+    # skipping base64 inlining (and its 33% payload overhead) entirely
+    use_files_api = os.getenv("USE_FILES_API", "").lower() in ("1", "true", "yes")
+
+    try:
+        if use_files_api:
+            st_res = os.stat(pdf_path)
+            file_id = upload_pdf(pdf_path, f"{st_res.st_size}:{st_res.st_mtime_ns}")
+            documents = [{
+                "type": "document",
+                "source": {"type": "file", "file_id": file_id},
+                "title": os.path.basename(pdf_path),
+                "citations": {"enabled": True},
+                "cache_control": {"type": "ephemeral"}
+            }]
+        else:
+            documents, content_hash = process_pdf(pdf_path)
+    except:
+        return
+
+    # Pin the document blocks in session state so reruns reuse the same
+    # objects without touching the cache-lookup machinery; sending the
+    # identical blocks each turn also maximizes prompt-cache hits
+    st.session_state.setdefault("documents", documents)
+    documents = st.session_state.documents
+
+    @st.cache_data(show_spinner=False)
+    def render_message(message):
+        """
+        Build the combined markdown (body plus references) for a chat message.
+        Cached so reruns format each historical message only once instead of
+        re-walking every citation on every script execution.
+
+        Args:
+            message: Chat history entry with content and citations
+
+        Returns:
+            str: Markdown for the whole message
+        """
+        parts = [message["content"]]
+        if message["citations"]:
+            parts.append("---")
+            parts.append("**References:**")
+            for idx, cite in enumerate(message["citations"], 1):
+                source = f"`{cite['document']}`" if cite['document'] else "the document"
+                parts.append(f"{idx}. From {source} (page {cite['start_page']}):  \n`{cite['text']}`")
+        return "\n\n".join(parts)
+
+    def append_message(role, content, citations=None):
+        """
+        Append a chat history entry, enforcing non-empty content at insertion
+        so later passes never have to re-filter the history.
+
+        Args:
+            role: "user" or "assistant"
+            content: Message text; whitespace-only content is dropped
+            citations: Citation list for assistant messages
+        """
+        content = content.strip()
+        if not content:
+            return
+        st.session_state.messages.append({
+            "role": role,
+            "content": content,
+            "citations": citations or []
+        })
+
+    # Initialize chat history in session state
+    if "messages" not in st.session_state:
+        st.session_state.messages = [{
+            "role": "assistant",
+            "content": "Ask me anything about the document!",
+            "citations": []
+        }]
+
+    # Display chat history with citations
+    for message in st.session_state.messages:
+        with st.chat_message(message["role"]):
+            st.markdown(render_message(message))
+
+    # Handle user input and generate response; whitespace-only input is
+    # dropped here so stored messages are always non-empty
+    if prompt := st.chat_input("Ask about your PDF"):
+        prompt = prompt.strip()
+    if prompt:
+        # Add user message to chat history
+        append_message("user", prompt)
+
+        with st.chat_message("user"):
+            st.markdown(prompt)
+
+        # Initialize Anthropic client (imported lazily - only needed once a
+        # question is actually asked)
+        import anthropic
+
+        client = anthropic.Anthropic(api_key=api_key)
+        
+        try:
+            with st.chat_message("assistant"), st.spinner("Analyzing document..."):
+                # The canonical API conversation persists in session state;
+                # the documents ride along only in the first user message and
+                # each turn appends just the new entries
+                if not st.session_state.get("api_messages"):
+                    st.session_state.api_messages = [{
+                        "role": "user",
+                        "content": [
+                            *documents,  # Include PDF chunks
+                            {"type": "text", "text": prompt}  # Add user question
+                        ]
+                    }]
+                else:
+                    st.session_state.api_messages.append({
+                        "role": "user",
+                        "content": [{"type": "text", "text": prompt}]
+                    })
+                messages = st.session_state.api_messages
+
+                # Show debug information if enabled; skipped for very long
+                # conversations where serializing the payload would stall the UI
+                if debug_mode and len(messages) < 100:
+                    st.subheader("Debug Information")
+                    st.code(orjson.dumps({"messages": messages},
+                                         option=orjson.OPT_INDENT_2).decode(),
+                            language="json")
+
+                # Stream the response so text renders as it arrives instead
+                # of waiting for the full completion
+                placeholder = st.empty()
+                full_response = ""
+                with client.messages.stream(
+                    model="claude-3-5-sonnet-20241022",
+                    max_tokens=4000,
+                    messages=messages,
+                    temperature=0.3,  # Lower temperature for more focused responses
+                    extra_headers={"anthropic-beta": "prompt-caching-2024-07-31,files-api-2025-04-14"
+                                   if use_files_api else "prompt-caching-2024-07-31"}
+                ) as stream:
+                    for text in stream.text_stream:
+                        full_response += text
+                        placeholder.markdown(full_response)
+                    response = stream.get_final_message()
+
+                # Validate API response
+                if not response:
+                    raise ValueError("Empty API response - no data received")
+                if not hasattr(response, 'content'):
+                    raise ValueError("Malformed API response - missing content field")
+                
+                # Show raw API response in debug mode
+                if debug_mode:
+                    st.json(response.model_dump())
+
+                # Extract citations from the final response in a single pass
+                citations = [{
+                    "document": getattr(cite, 'document_title', None) or 'Unknown Document',
+                    "start_page": getattr(cite, 'start_page_number', None) or 0,
+                    "end_page": getattr(cite, 'end_page_number', None) or 0,
+                    "text": (getattr(cite, 'cited_text', None) or '')[:150] + "..."  # Truncate long citations
+                } for content_block in getattr(response, 'content', [])
+                    if content_block.type == "text"
+                    for cite in (getattr(content_block, 'citations', None) or ())]
+
+                # Display the citations (the response itself streamed above)
+                if citations:
+                    st.markdown("---")
+                    st.markdown("**References:**")
+                    for idx, cite in enumerate(citations, 1):
+                        source = f"`{cite['document']}`" if cite['document'] else "the document"
+                        st.markdown(f"{idx}. From {source} (page {cite['start_page']}):  \n`{cite['text']}`")
+                
+                # Update chat history with assistant's response
+                st.session_state.api_messages.append({
+                    "role": "assistant",
+                    "content": [{"type": "text", "text": full_response}]
+                })
+                append_message("assistant", full_response, citations)
+
+        except Exception as e:
+            # Handle errors and provide debug information
+            error_msg = f"🚨 Error processing request: {str(e)}"
+            st.error(error_msg)
+            if debug_mode:
+                st.code(traceback.format_exc())
+            st.session_state.messages.pop()  # Remove failed prompt from history
+            if st.session_state.get("api_messages") and st.session_state.api_messages[-1]["role"] == "user":
+                st.session_state.api_messages.pop()
+
+if __name__ == "__main__":
+    main("documents/Dario_Amodai Machines of loving grace.pdf")
\ No newline at end of file